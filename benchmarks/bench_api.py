@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Load tests the API endpoints, either in-process on the local backend or against a running server."""
+
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+DOCKER_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docker"
+)
+
+# Endpoints Requested by the Load Generator
+ROUTES = [
+    "/api/v1/{}/{}/{}".format(ns, metric, top)
+    for ns in ["huffsimple", "huffdecay", "gravity"]
+    for metric in ["incoming", "outgoing", "probability"]
+    for top in [10, 1000]
+]
+
+
+def _percentile(values: list, q: float) -> float:
+    """Returns the q-th percentile of sorted values, using the nearest rank."""
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def _serve_local() -> tuple:
+    """Starts the API on the local backend in a background thread.
+
+    :return tuple: Base URL of the server and the server itself
+    """
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    os.environ["BACKEND"] = "local"
+    sys.path.insert(0, DOCKER_DIR)
+
+    from app import app
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return "http://127.0.0.1:{}".format(server.server_port), server
+
+
+def run(
+    requests: int = 2000, concurrency: int = 8, url: str = None, gzip: bool = True
+) -> dict:
+    """Sends requests across all ranked GeoJSON routes and records their latency.
+
+    :param int requests: Total number of requests sent, defaults to 2000
+    :param int concurrency: Number of concurrent clients, defaults to 8
+    :param str url: Base URL of a running server, defaults to serving the local backend in-process
+    :param bool gzip: Whether clients accept gzip responses, defaults to True
+    :return dict: Measurements
+    """
+    server = None
+
+    if url is None:
+        url, server = _serve_local()
+
+    headers = {"Accept-Encoding": "gzip"} if gzip else {}
+
+    def fetch(i):
+        request = urllib.request.Request(url + ROUTES[i % len(ROUTES)], headers=headers)
+        start = time.perf_counter()
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                size = len(response.read())
+                ok = response.status == 200
+        except Exception:
+            size, ok = 0, False
+
+        return time.perf_counter() - start, size, ok
+
+    try:
+        # Warm Up
+        for i in range(len(ROUTES)):
+            fetch(i)
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(fetch, range(requests)))
+
+        seconds = time.perf_counter() - start
+
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    latencies = sorted(r[0] * 1000 for r in results)
+
+    return {
+        "requests_per_sec": requests / seconds,
+        "bytes_per_request": sum(r[1] for r in results) / requests,
+        "errors": sum(1 for r in results if not r[2]),
+        "latency_p50_ms": _percentile(latencies, 50),
+        "latency_p90_ms": _percentile(latencies, 90),
+        "latency_p99_ms": _percentile(latencies, 99),
+    }
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks WeatherLoader.extract/transform against Mesonet GeoJSON fixtures."""
+
+import glob
+import json
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import synthetic
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def record(month: int, year: int) -> str:
+    """Records a live Mesonet daily response as a fixture.
+
+    :param int month: Month that data will be queried for
+    :param int year: Year that data will be queried for
+    :return str: Path of the recorded fixture
+    """
+    import requests
+
+    from bmsb.etl import WeatherLoader
+
+    response = requests.get(WeatherLoader(month, year).url)
+    response.raise_for_status()
+
+    path = os.path.join(FIXTURE_DIR, "mesonet_{}_{:02d}.geojson".format(year, month))
+
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+    return path
+
+
+def _fixture(stations: int, days: int) -> bytes:
+    """Returns the first fixture by name, or generates one if there are none.
+
+    Recorded fixtures ("mesonet_<year>_<month>.geojson") sort before the
+    committed "mesonet_synthetic.geojson", so they are used once recorded.
+
+    :param int stations: Number of stations in a synthetic fixture
+    :param int days: Number of days in a synthetic fixture
+    :return bytes: GeoJSON response body
+    """
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.geojson")))
+
+    if paths:
+        with open(paths[0], "rb") as f:
+            return f.read()
+
+    return json.dumps(synthetic.mesonet_geojson(stations, days)).encode("utf-8")
+
+
+def run(stations: int = 100, days: int = 31, repeat: int = 10) -> dict:
+    """Times extraction and transformation of a fixture served from a local HTTP server.
+
+    The first run warms up the server and parsers and is not timed. Rates are
+    computed from the fastest of the repeated runs.
+
+    :param int stations: Number of stations in a synthetic fixture, defaults to 100
+    :param int days: Number of days in a synthetic fixture, defaults to 31
+    :param int repeat: Number of timed runs, defaults to 10
+    :return dict: Measurements
+    """
+    from bmsb.etl import WeatherLoader
+
+    body = _fixture(stations, days)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/geo+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    extract_seconds, transform_seconds = [], []
+
+    try:
+        for i in range(repeat + 1):
+            wl = WeatherLoader(7, 2022)
+            wl.url = "http://127.0.0.1:{}/daily.geojson".format(server.server_port)
+
+            start = time.perf_counter()
+            wl.extract()
+            extracted = time.perf_counter()
+            rows = len(wl.df)
+            wl.transform()
+            end = time.perf_counter()
+
+            if i > 0:
+                extract_seconds.append(extracted - start)
+                transform_seconds.append(end - extracted)
+
+    finally:
+        server.shutdown()
+
+    extract_seconds = min(extract_seconds)
+    transform_seconds = min(transform_seconds)
+
+    return {
+        "bytes": len(body),
+        "rows": rows,
+        "rows_kept": len(wl.df),
+        "extract_rows_per_sec": rows / extract_seconds,
+        "transform_rows_per_sec": rows / transform_seconds,
+    }
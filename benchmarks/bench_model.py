@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks Simulation.monte_carlo on synthetic origin-destination graphs."""
+
+import time
+
+from benchmarks import synthetic
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+
+def run(
+    cities: int = 3000,
+    neighbours: int = 300,
+    max_distance: float = 50,
+    sims: int = 100,
+    model: str = "HUFF_SIMPLE",
+    seed: int = 0,
+    repeat: int = 10,
+) -> dict:
+    """Times loading and a Monte Carlo run on a synthetic graph, after one warm-up run.
+
+    Each measurement is the fastest of the repeated runs, the least noisy estimate
+    of CPU-bound work. Links are kept up to max_distance, as in the analysis
+    notebook, so neighbours only has to be large enough for no city to run out of
+    links within that distance.
+
+    :param int cities: Number of cities in the graph, defaults to 3000
+    :param int neighbours: Number of nearest cities linked to each city, defaults to 300
+    :param float max_distance: Links longer than this are dropped, defaults to 50
+    :param int sims: Number of simulations that will be run, defaults to 100
+    :param str model: Name of model to use, defaults to "HUFF_SIMPLE"
+    :param int seed: Random seed, defaults to 0
+    :param int repeat: Number of timed runs, defaults to 10
+    :return dict: Measurements
+    """
+    from bmsb.model import Simulation
+
+    cities_df = synthetic.cities(cities, seed=seed)
+    df = synthetic.simulation_frame(
+        cities_df, synthetic.distances(cities_df, neighbours), max_distance
+    )
+
+    load_seconds, seconds = [], []
+
+    # First Run Warms Up Caches & Allocator, and is Not Timed
+    for i in range(repeat + 1):
+        start = time.perf_counter()
+        sim = Simulation(df, seed=seed)
+        loaded = time.perf_counter()
+        sim.monte_carlo(model, sims, True)
+        end = time.perf_counter()
+
+        if i > 0:
+            load_seconds.append(loaded - start)
+            seconds.append(end - loaded)
+
+    load_seconds = min(load_seconds)
+    seconds = min(seconds)
+
+    return {
+        "edges": len(df),
+        "load_seconds": load_seconds,
+        "seconds": seconds,
+        "iterations_per_sec": sims / seconds,
+        "edges_per_sec": sims * len(df) / seconds,
+    }
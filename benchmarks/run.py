@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Runs the benchmark suite, saves results as baselines and compares runs against them.
+
+Example
+-------
+> python -m benchmarks.run model etl api --save benchmarks/baselines/main.json
+> python -m benchmarks.run model --cities 900 --compare benchmarks/baselines/main.json
+> python -m benchmarks.run record --month 7 --year 2022
+"""
+
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+BENCHMARKS = ["model", "etl", "api"]
+
+# Metrics Compared Against Baselines, by the Direction of Improvement
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "seconds", "peak_rss_mb", "errors")
+
+
+def _measure(name: str, params: dict) -> dict:
+    """Runs a single benchmark and records the peak RSS of the process.
+
+    :param str name: Name of the benchmark
+    :param dict params: Keyword arguments of the benchmark
+    :return dict: Measurements
+    """
+    module = importlib.import_module("benchmarks.bench_" + name)
+    result = module.run(**params)
+
+    # ru_maxrss is Reported in KB on Linux & Bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_mb"] = rss / (1024**2 if sys.platform == "darwin" else 1024)
+
+    return result
+
+
+def run(name: str, params: dict) -> dict:
+    """Runs a benchmark in a fresh process, so peak RSS is not shared between benchmarks.
+
+    :param str name: Name of the benchmark
+    :param dict params: Keyword arguments of the benchmark
+    :return dict: Measurements
+    """
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        try:
+            return pool.submit(_measure, name, params).result()
+
+        # Benchmarks Needing Unavailable Packages (e.g. ArcPy) are Skipped
+        except ImportError as e:
+            return {"skipped": str(e)}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Compares results with a baseline.
+
+    :param dict results: Measurements of the current run
+    :param dict baseline: Measurements of the baseline run
+    :param float threshold: Relative change that counts as a regression
+    :return list: Descriptions of metrics that regressed
+    """
+    regressions = []
+
+    for name, metrics in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name, {})
+
+        for metric, value in metrics.items():
+            old = base.get(metric)
+
+            if old is None or not metric.endswith(HIGHER_IS_BETTER + LOWER_IS_BETTER):
+                continue
+
+            # Any Increase from a Zero Baseline is an Infinite Relative Change
+            if old == 0:
+                change = 0.0 if value == old else math.copysign(math.inf, value)
+            else:
+                change = (value - old) / old
+
+            if metric.endswith(LOWER_IS_BETTER):
+                worse = change > threshold
+            else:
+                worse = change < -threshold
+
+            flag = "REGRESSED" if worse else ""
+
+            print(
+                "{:>6} {:<24} {:>14.4g} {:>14.4g} {:>+8.1%} {}".format(
+                    name, metric, old, value, change, flag
+                )
+            )
+
+            if worse:
+                regressions.append("{}.{}".format(name, metric))
+
+    return regressions
+
+
+def main() -> int:
+    """Entry point of the benchmark suite.
+
+    :return int: Exit code, non-zero when a metric regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="+", choices=BENCHMARKS + ["record"])
+    parser.add_argument("--cities", type=int, default=3000)
+    parser.add_argument("--neighbours", type=int, default=300)
+    parser.add_argument("--max-distance", type=float, default=50)
+    parser.add_argument("--sims", type=int, default=100)
+    parser.add_argument("--model", default="HUFF_SIMPLE")
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--url", help="Base URL of a running API server")
+    parser.add_argument("--month", type=int, default=7)
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--save", help="Path the results are saved to")
+    parser.add_argument("--compare", help="Path of a baseline to compare against")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Record Fixture Instead of Benchmarking
+    if args.benchmarks == ["record"]:
+        from benchmarks.bench_etl import record
+
+        print(record(args.month, args.year))
+        return 0
+
+    params = {
+        "model": {
+            "cities": args.cities,
+            "neighbours": args.neighbours,
+            "max_distance": args.max_distance,
+            "sims": args.sims,
+            "model": args.model,
+            "repeat": args.repeat,
+        },
+        "etl": {"stations": args.stations, "days": args.days, "repeat": args.repeat},
+        "api": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "url": args.url,
+        },
+    }
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {name: params[name] for name in args.benchmarks},
+        "benchmarks": {},
+    }
+
+    for name in args.benchmarks:
+        results["benchmarks"][name] = run(name, params[name])
+        print(name, json.dumps(results["benchmarks"][name], indent=2))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        for name in args.benchmarks:
+            if baseline["params"].get(name) != params[name]:
+                print(
+                    "Warning: {} baseline was recorded with different parameters".format(
+                        name
+                    )
+                )
+
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
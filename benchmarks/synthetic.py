@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Generates synthetic inputs shaped like the real pipeline data for benchmarking."""
+
+import numpy as np
+import pandas as pd
+
+from pandas import DataFrame
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+# Approximate Extent of MN in UTM 15N Miles
+EXTENT = (-120.0, 3000.0, 230.0, 3420.0)
+
+# MN Bounding Box Used by the ETL QA Filters
+BBOX = (-97.5, 43.0, -89.0, 49.5)
+
+
+def cities(n: int, presence_rate: float = 0.05, seed: int = 0) -> DataFrame:
+    """Generates cities with the columns the analysis notebook keeps after weighting.
+
+    :param int n: Number of cities
+    :param float presence_rate: Share of cities with observed BMSB presence, defaults to 0.05
+    :param int seed: Random seed, defaults to 0
+    :return DataFrame: Cities with "OBJECTID", "City", "Wi", "Observations: Presence", "x" and "y"
+    """
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame(
+        {
+            "OBJECTID": np.arange(1, n + 1),
+            "City": ["City {}".format(i) for i in range(1, n + 1)],
+            "Wi": rng.normal(0.5, 1.5, n),
+            "Observations: Presence": (rng.random(n) < presence_rate).astype(int),
+            "x": rng.uniform(EXTENT[0], EXTENT[2], n),
+            "y": rng.uniform(EXTENT[1], EXTENT[3], n),
+        }
+    )
+
+
+def distances(cities_df: DataFrame, neighbours: int = 100) -> DataFrame:
+    """Generates origin-destination links to the nearest cities, matching the distances.csv schema.
+
+    :param DataFrame cities_df: Cities created by cities()
+    :param int neighbours: Number of nearest cities linked to each city, defaults to 100
+    :return DataFrame: Links with "OID_", "Shape_Length", "ORIG_FID", "DEST_FID" and "LINK_DIST"
+    """
+    xy = cities_df[["x", "y"]].to_numpy()
+    ids = cities_df["OBJECTID"].to_numpy()
+    k = min(neighbours, len(xy))
+
+    orig, dest, dist = [], [], []
+
+    # Work in Blocks to Bound Memory of the Distance Matrix
+    for start in range(0, len(xy), 1024):
+        block = xy[start : start + 1024]
+        d = np.hypot(
+            block[:, None, 0] - xy[None, :, 0], block[:, None, 1] - xy[None, :, 1]
+        )
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+
+        orig.append(np.repeat(ids[start : start + len(block)], k))
+        dest.append(ids[nearest].ravel())
+        dist.append(np.take_along_axis(d, nearest, axis=1).ravel())
+
+    link_dist = np.concatenate(dist)
+
+    return pd.DataFrame(
+        {
+            "OID_": np.arange(1, len(link_dist) + 1),
+            "Shape_Length": link_dist * 1609.344,
+            "ORIG_FID": np.concatenate(orig),
+            "DEST_FID": np.concatenate(dest),
+            "LINK_DIST": link_dist,
+        }
+    )
+
+
+def simulation_frame(
+    cities_df: DataFrame, distances_df: DataFrame, max_distance: float = 50
+) -> DataFrame:
+    """Joins cities and links into the frame expected by Simulation, as in the analysis notebook.
+
+    :param DataFrame cities_df: Cities created by cities()
+    :param DataFrame distances_df: Links created by distances()
+    :param float max_distance: Links longer than this are dropped, defaults to 50
+    :return DataFrame: Input dataframe for Simulation
+    """
+    cities_df = cities_df[["OBJECTID", "City", "Wi", "Observations: Presence"]]
+    lags_df = distances_df.drop(["OID_", "Shape_Length"], axis=1)
+
+    # Join
+    df = lags_df.merge(cities_df, left_on="ORIG_FID", right_on="OBJECTID")
+    df = df.merge(
+        cities_df, left_on="DEST_FID", right_on="OBJECTID", suffixes=("", "_TO")
+    )
+
+    # Drop Columns & Add Empty End Presence Field
+    df = df.drop(
+        [
+            "ORIG_FID",
+            "DEST_FID",
+            "OBJECTID",
+            "OBJECTID_TO",
+            "Observations: Presence_TO",
+        ],
+        axis=1,
+    )
+    df["BMSB Presence: j"] = 0
+
+    df.columns = [
+        "Distance",
+        "City: From",
+        "W: From",
+        "BMSB Presence: From",
+        "City: To",
+        "W: To",
+        "BMSB Presence: To",
+    ]
+
+    # Drop Self Links & Long Distances
+    df = df[df["City: From"] != df["City: To"]]
+    df = df.loc[df["Distance"] < max_distance]
+
+    return df.reset_index(drop=True)
+
+
+def mesonet_geojson(
+    stations: int = 100, days: int = 31, month: int = 7, year: int = 2022, seed: int = 0
+) -> dict:
+    """Generates a response shaped like the Mesonet daily GeoJSON API.
+
+    A small share of records are null, negative or outside of MN, so every
+    QA filter in WeatherLoader.transform() has rows to drop.
+
+    :param int stations: Number of weather stations, defaults to 100
+    :param int days: Number of days reported by each station, defaults to 31
+    :param int month: Month of the records, defaults to 7
+    :param int year: Year of the records, defaults to 2022
+    :param int seed: Random seed, defaults to 0
+    :return dict: GeoJSON FeatureCollection
+    """
+    rng = np.random.default_rng(seed)
+
+    x = rng.uniform(BBOX[0] - 0.5, BBOX[2] + 0.5, stations)
+    y = rng.uniform(BBOX[1] - 0.5, BBOX[3] + 0.5, stations)
+
+    features = []
+
+    for s in range(stations):
+        for d in range(1, days + 1):
+            max_tmpf = float(rng.normal(80, 8))
+            min_tmpf = max_tmpf - float(rng.uniform(10, 25))
+            precip = float(rng.exponential(0.1))
+            draw = rng.random()
+
+            if draw < 0.03:
+                precip = None
+            elif draw < 0.05:
+                precip = -99.0
+            elif draw < 0.07:
+                max_tmpf = None
+
+            features.append(
+                {
+                    "type": "Feature",
+                    "id": len(features),
+                    "properties": {
+                        "station": "R{:04d}".format(s),
+                        "name": "Station {}".format(s),
+                        "date": "{}-{:02d}-{:02d}".format(year, month, d),
+                        "max_tmpf": max_tmpf,
+                        "min_tmpf": min_tmpf,
+                        "precip": precip,
+                    },
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [float(x[s]), float(y[s])],
+                    },
+                }
+            )
+
+    return {"type": "FeatureCollection", "features": features}
@@ -6,18 +6,33 @@ import os
 import pandas as pd
 import requests
 
-import arcgis
-import arcpy
-
 from os import PathLike
 from pandas import DataFrame, Series
 from typing import List
 
+from bmsb import metrics
+
 __author__ = "Luke Zaruba"
 __credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
 __status__ = "Production"
 
 
+def _keep(df: DataFrame, mask: Series, loader: str, qa_filter: str) -> DataFrame:
+    """Keeps rows passing a QA filter and counts the rows it dropped.
+
+    :param DataFrame df: DataFrame being filtered
+    :param Series mask: Boolean series, True for rows that are kept
+    :param str loader: Name of the loader applying the filter
+    :param str qa_filter: Name of the QA filter
+    :return DataFrame: Filtered DataFrame
+    """
+    metrics.count(
+        "etl_rows_dropped", int((~mask).sum()), loader=loader, qa_filter=qa_filter
+    )
+
+    return df.loc[mask]
+
+
 class WeatherLoader:
     """
     A class used to extract and transform daily MN weather data automatically.
@@ -111,11 +126,17 @@ class WeatherLoader:
         :param str fc_name: Name of the output feature class
         :param DataFrame df: Input dataframe that will be converted to a feature class
         """
-        # Convert Weather Observations from DF to SEDF
-        sedf = arcgis.GeoAccessor.from_xy(df, "x", "y")
+        # ArcGIS is Only Needed to Load, so Extract/Transform Run Without it
+        import arcgis
+
+        with metrics.timer("etl_stage_seconds", loader="weather", stage="load"):
+            # Convert Weather Observations from DF to SEDF
+            sedf = arcgis.GeoAccessor.from_xy(df, "x", "y")
+
+            # Convert Weather Observations from SEDF to FC
+            sedf.spatial.to_featureclass(location=os.path.join(geodatabase, fc_name))
 
-        # Convert Weather Observations from SEDF to FC
-        sedf.spatial.to_featureclass(location=os.path.join(geodatabase, fc_name))
+        metrics.count("etl_rows", len(df), loader="weather", stage="load")
 
     @staticmethod
     def _extractToCol(df: DataFrame, field: Series) -> None:
@@ -143,8 +164,13 @@ class WeatherLoader:
         }
 
         # Perform Aggregation
-        self.aggregated_df = self.df.groupby(self.df["station"]).aggregate(
-            agg_functions
+        with metrics.timer("etl_stage_seconds", loader="weather", stage="aggregate"):
+            self.aggregated_df = self.df.groupby(self.df["station"]).aggregate(
+                agg_functions
+            )
+
+        metrics.count(
+            "etl_rows", len(self.aggregated_df), loader="weather", stage="aggregate"
         )
 
         # Return DF
@@ -152,47 +178,70 @@ class WeatherLoader:
 
     def extract(self) -> None:
         """Extracts data from API and performs miminal cleaning to return as a DataFrame."""
-        # Get Response & Convert to DF
-        response = requests.get(self.url)
-        json = response.json()["features"]
-        df_raw = pd.DataFrame.from_records(json)
+        # Get Response
+        with metrics.timer("etl_stage_seconds", loader="weather", stage="fetch"):
+            response = requests.get(self.url)
+
+        metrics.count("etl_bytes_fetched", len(response.content), loader="weather")
+
+        with metrics.timer("etl_stage_seconds", loader="weather", stage="extract"):
+            # Convert to DF
+            json = response.json()["features"]
+            df_raw = pd.DataFrame.from_records(json)
 
-        # Series Conversion from Dicts to Actual Vals
-        desiredSeries = ["station", "date", "max_tmpf", "min_tmpf", "precip", "name"]
+            # Series Conversion from Dicts to Actual Vals
+            desiredSeries = [
+                "station",
+                "date",
+                "max_tmpf",
+                "min_tmpf",
+                "precip",
+                "name",
+            ]
 
-        for s in desiredSeries:
-            self._extractToCol(df_raw, s)
+            for s in desiredSeries:
+                self._extractToCol(df_raw, s)
 
-        # Extract Geometries
-        df_raw["x"] = df_raw["geometry"].apply(lambda x: dict(x)["coordinates"][0])
-        df_raw["y"] = df_raw["geometry"].apply(lambda x: dict(x)["coordinates"][1])
+            # Extract Geometries
+            df_raw["x"] = df_raw["geometry"].apply(lambda x: dict(x)["coordinates"][0])
+            df_raw["y"] = df_raw["geometry"].apply(lambda x: dict(x)["coordinates"][1])
 
-        # Copy Useful Columns to new DF
-        self.df = df_raw[
-            ["station", "date", "max_tmpf", "min_tmpf", "precip", "name", "x", "y"]
-        ].copy()
+            # Copy Useful Columns to new DF
+            self.df = df_raw[
+                ["station", "date", "max_tmpf", "min_tmpf", "precip", "name", "x", "y"]
+            ].copy()
+
+        metrics.count("etl_rows", len(self.df), loader="weather", stage="extract")
 
     def transform(self) -> None:
         """Transforms and performs QAQC on raw DataFrame to create cleaned DataFrame."""
-        # Fill NA Precip Values
-        self.df["precip"].fillna(0, inplace=True)
+        with metrics.timer("etl_stage_seconds", loader="weather", stage="transform"):
+            # Fill NA Precip Values
+            self.df["precip"].fillna(0, inplace=True)
+
+            # Drop Rows where 'precip' < 0
+            self.df = _keep(self.df, self.df["precip"] >= 0, "weather", "precip")
 
-        # Drop Rows where 'precip' < 0
-        self.df = self.df.loc[self.df["precip"] >= 0]
+            # Drop Rows with Null 'Latitude' or 'Longitude'
+            self.df = _keep(
+                self.df,
+                self.df[["x", "y", "max_tmpf", "min_tmpf"]].notna().all(axis=1),
+                "weather",
+                "nulls",
+            )
 
-        # Drop Rows with Null 'Latitude' or 'Longitude'
-        self.df = self.df.dropna(subset=["x", "y", "max_tmpf", "min_tmpf"])
+            # Convert Data Types
+            self.df["station"] = self.df["station"].astype(str)
+            self.df["name"] = self.df["name"].astype(str)
+            self.df["date"] = self.df["date"].astype("datetime64[ns]")
 
-        # Convert Data Types
-        self.df["station"] = self.df["station"].astype(str)
-        self.df["name"] = self.df["name"].astype(str)
-        self.df["date"] = self.df["date"].astype("datetime64[ns]")
+            # Drop Rows where Lat/Lon are Outside MN BBox
+            self.df = _keep(self.df, self.df["x"] > -97.5, "weather", "bbox")
+            self.df = _keep(self.df, self.df["x"] < -89.0, "weather", "bbox")
+            self.df = _keep(self.df, self.df["y"] > 43.0, "weather", "bbox")
+            self.df = _keep(self.df, self.df["y"] < 49.5, "weather", "bbox")
 
-        # Drop Rows where Lat/Lon are Outside MN BBox
-        self.df = self.df.loc[self.df["x"] > -97.5]
-        self.df = self.df.loc[self.df["x"] < -89.0]
-        self.df = self.df.loc[self.df["y"] > 43.0]
-        self.df = self.df.loc[self.df["y"] < 49.5]
+        metrics.count("etl_rows", len(self.df), loader="weather", stage="transform")
 
 
 class ObservationLoader:
@@ -230,27 +279,46 @@ class ObservationLoader:
         :param PathLike geodatabase: Path to the geodatabase where the output feature class will be stored
         :param str fc_name: Name of the output feature class
         """
-        # Convert from DF to SEDF
-        sedf = arcgis.GeoAccessor.from_xy(self.df, "Longitude", "Latitude")
+        import arcgis
+
+        with metrics.timer("etl_stage_seconds", loader="observation", stage="load"):
+            # Convert from DF to SEDF
+            sedf = arcgis.GeoAccessor.from_xy(self.df, "Longitude", "Latitude")
+
+            # Convert Weather Observations from SEDF to FC
+            sedf.spatial.to_featureclass(location=os.path.join(geodatabase, fc_name))
 
-        # Convert Weather Observations from SEDF to FC
-        sedf.spatial.to_featureclass(location=os.path.join(geodatabase, fc_name))
+        metrics.count("etl_rows", len(self.df), loader="observation", stage="load")
 
     def transform(self) -> None:
         """Cleans and transforms dataframe."""
-        # Narrow Down Columns
-        self.df = self.df[["objectid", "ObsDate", "Latitude", "Longitude"]].copy()
-
-        # Nulls
-        self.df = self.df.dropna(subset=["Latitude", "Longitude"])
-
-        # Casting
-        self.df["ObsDate"] = self.df["ObsDate"].astype("datetime64[ns]")
-        self.df["Latitude"] = self.df["Latitude"].astype(float)
-        self.df["Longitude"] = self.df["Longitude"].astype(float)
-
-        # Geometry QA
-        self.df = self.df.loc[self.df["Longitude"] > -97.5]
-        self.df = self.df.loc[self.df["Longitude"] < -89.0]
-        self.df = self.df.loc[self.df["Latitude"] > 43.0]
-        self.df = self.df.loc[self.df["Latitude"] < 49.5]
+        with metrics.timer(
+            "etl_stage_seconds", loader="observation", stage="transform"
+        ):
+            # Narrow Down Columns
+            self.df = self.df[["objectid", "ObsDate", "Latitude", "Longitude"]].copy()
+
+            # Nulls
+            self.df = _keep(
+                self.df,
+                self.df[["Latitude", "Longitude"]].notna().all(axis=1),
+                "observation",
+                "nulls",
+            )
+
+            # Casting
+            self.df["ObsDate"] = self.df["ObsDate"].astype("datetime64[ns]")
+            self.df["Latitude"] = self.df["Latitude"].astype(float)
+            self.df["Longitude"] = self.df["Longitude"].astype(float)
+
+            # Geometry QA
+            self.df = _keep(
+                self.df, self.df["Longitude"] > -97.5, "observation", "bbox"
+            )
+            self.df = _keep(
+                self.df, self.df["Longitude"] < -89.0, "observation", "bbox"
+            )
+            self.df = _keep(self.df, self.df["Latitude"] > 43.0, "observation", "bbox")
+            self.df = _keep(self.df, self.df["Latitude"] < 49.5, "observation", "bbox")
+
+        metrics.count("etl_rows", len(self.df), loader="observation", stage="transform")
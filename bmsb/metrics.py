@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Provides pluggable timing and counter hooks for the simulation and ETL hot paths."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+
+class Sink:
+    """
+    A class used as the base of all metric sinks. Discards every measurement.
+
+    Methods
+    -------
+    timing(name, seconds, **labels)
+        Records the duration of an operation.
+    count(name, value, **labels)
+        Increments a counter.
+    """
+
+    def timing(self, name: str, seconds: float, **labels) -> None:
+        """Records the duration of an operation.
+
+        :param str name: Name of the metric
+        :param float seconds: Duration of the operation
+        """
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """Increments a counter.
+
+        :param str name: Name of the metric
+        :param float value: Amount the counter is incremented by, defaults to 1
+        """
+
+
+class LoggingSink(Sink):
+    """
+    A class used to write every measurement to a logger.
+    """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        """Initializes the LoggingSink class.
+
+        :param logging.Logger logger: Logger that is written to, defaults to the "bmsb.metrics" logger
+        :param int level: Level measurements are logged at, defaults to logging.INFO
+        """
+        self.logger = logger or logging.getLogger("bmsb.metrics")
+        self.level = level
+
+    def timing(self, name: str, seconds: float, **labels) -> None:
+        self.logger.log(self.level, "%s %s %.6fs", name, labels, seconds)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        self.logger.log(self.level, "%s %s +%s", name, labels, value)
+
+
+class MemorySink(Sink):
+    """
+    A class used to aggregate measurements in memory.
+
+    Timings are kept as a count, sum and maximum per metric and label set, and
+    counters as a running total, for inspection from notebooks and benchmarks.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the MemorySink class."""
+        self.timings: Dict[Tuple, list] = {}
+        self.counts: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def timing(self, name: str, seconds: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            summary = self.timings.setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += seconds
+            summary[2] = max(summary[2], seconds)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+# Sink Receiving all Measurements - Discards them Unless Replaced
+_sink = Sink()
+
+
+def set_sink(sink: Sink) -> None:
+    """Replaces the sink that receives all measurements.
+
+    :param Sink sink: Sink that will receive measurements
+    """
+    global _sink
+    _sink = sink
+
+
+def get_sink() -> Sink:
+    """Returns the sink that receives all measurements."""
+    return _sink
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """Increments a counter on the current sink.
+
+    :param str name: Name of the metric
+    :param float value: Amount the counter is incremented by, defaults to 1
+    """
+    _sink.count(name, value, **labels)
+
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    """Times the enclosed block and records it on the current sink.
+
+    :param str name: Name of the metric
+    """
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        _sink.timing(name, time.perf_counter() - start, **labels)
@@ -3,12 +3,14 @@
 
 import os
 
+import numpy as np
 import pandas as pd
-from random import random
 from tqdm import tqdm
 
+from numpy import ndarray
 from pandas import DataFrame
-from typing import List
+
+from bmsb import metrics
 
 __author__ = "Luke Zaruba"
 __credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
@@ -19,6 +21,12 @@ class Simulation:
     """
     A class used to simulate BMSB spread using different spatial interaction models.
 
+    On load, the fields used by the simulation are converted to a compact
+    representation: int32 city codes into one shared array of names, float32
+    distances, weights and probabilities, and uint8 presence flags. Other input
+    columns are kept unchanged. The df property rebuilds the full frame, in the
+    input column order, only after the simulation state changes.
+
     Methods
     -------
     monte_carlo(model, num_sims, increase_prob)
@@ -42,6 +50,7 @@ class Simulation:
         to_presence_field="BMSB Presence: To",
         to_id_field="City: To",
         to_w_field="W: To",
+        seed=None,
     ) -> None:
         """Initializes the Simulation class.
 
@@ -53,8 +62,9 @@ class Simulation:
         :param str to_presence_field: Name of series that represents destination presence, defaults to "BMSB Presence: To"
         :param str to_id_field: Name of series that represents destination ID, defaults to "City: To"
         :param str to_w_field: Name of series that represents destination weight, defaults to "W: To"
+        :param int seed: Seed of the random number generator, defaults to None
+        :raises ValueError: Error raised when an origin or destination ID is null
         """
-        self.df = df.copy()
         self.dist_field = dist_field
         self.from_presence_field = from_presence_field
         self.from_id_field = from_id_field
@@ -63,6 +73,81 @@ class Simulation:
         self.to_id_field = to_id_field
         self.to_w_field = to_w_field
 
+        # Encode Origin & Destination Cities Against One Shared Dictionary
+        codes, self.names = pd.factorize(
+            pd.concat([df[from_id_field], df[to_id_field]], ignore_index=True)
+        )
+
+        # Null IDs are Coded as -1, which would Index the Last City
+        if (codes < 0).any():
+            raise ValueError("Origin and destination IDs must not be null")
+
+        self.from_codes = codes[: len(df)].astype(np.int32)
+        self.to_codes = codes[len(df) :].astype(np.int32)
+
+        # Compact Edge Attributes
+        self.index = df.index
+        self.distance = df[dist_field].to_numpy(np.float32)
+        self.from_w = df[from_w_field].to_numpy(np.float32)
+        self.to_w = df[to_w_field].to_numpy(np.float32)
+        self.from_presence = df[from_presence_field].to_numpy(np.uint8)
+        self.to_presence = df[to_presence_field].to_numpy(np.uint8)
+
+        # Keep Other Input Columns, & the Input Column Order
+        self.columns = list(df.columns)
+        self.other = df.drop(
+            columns=[
+                dist_field,
+                from_id_field,
+                from_w_field,
+                from_presence_field,
+                to_id_field,
+                to_w_field,
+                to_presence_field,
+            ]
+        )
+
+        # Fields Added by Model Runs, in the Order they were Added
+        self.fields = {}
+
+        # Frame Built by the df Property, Until the Simulation State Changes
+        self._df = None
+
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def df(self) -> DataFrame:
+        """Current state of the simulation, as a dataframe with one row per edge."""
+        if self._df is None:
+            simulated = {
+                self.dist_field: self.distance,
+                self.from_id_field: self.names.take(self.from_codes),
+                self.from_w_field: self.from_w,
+                self.from_presence_field: self.from_presence,
+                self.to_id_field: self.names.take(self.to_codes),
+                self.to_w_field: self.to_w,
+                self.to_presence_field: self.to_presence,
+            }
+
+            # Copied, so Edits to the Frame Never Change the Simulation State
+            df = pd.DataFrame(
+                {
+                    column: simulated[column]
+                    if column in simulated
+                    else self.other[column]
+                    for column in self.columns
+                },
+                index=self.index,
+                copy=True,
+            )
+
+            for field, values in self.fields.items():
+                df[field] = values
+
+            self._df = df
+
+        return self._df
+
     def monte_carlo(self, model: str, num_sims: int, increase_prob=False) -> DataFrame:
         """Method used to run a monte carlo simulation.
 
@@ -72,8 +157,8 @@ class Simulation:
         :raises ValueError: Error raised when invalid model is passed
         :return DataFrame: Simulation results
         """
-        # Get Initial List of Starting Presence
-        starting_presence = list(self.df[self.from_presence_field])
+        # Get Initial Starting Presence
+        starting_presence = self.from_presence.copy()
 
         # Probability Fields
         if model == "HUFF_SIMPLE":
@@ -82,11 +167,7 @@ class Simulation:
             transition_cnt_field = "HS: Transition Count"
 
             # Calculate
-            self.df[probability_numerator] = (
-                self.df[self.to_w_field] / self.df[self.dist_field]
-            )
-            sum_prob_num = self.df[probability_numerator].sum()
-            self.df[probability_field] = self.df[probability_numerator] / sum_prob_num
+            numerator = self.to_w / self.distance
 
         elif model == "HUFF_DECAY":
             probability_numerator = "HD2: Wi/Dij"
@@ -94,11 +175,7 @@ class Simulation:
             transition_cnt_field = "HD2: Transition Count"
 
             # Calculate
-            self.df[probability_numerator] = self.df[self.to_w_field] / (
-                self.df[self.dist_field] ** 2
-            )
-            sum_prob_num = self.df[probability_numerator].sum()
-            self.df[probability_field] = self.df[probability_numerator] / sum_prob_num
+            numerator = self.to_w / (self.distance**2)
 
         elif model == "GRAVITY_SIMPLE":
             probability_numerator = "Gravity"
@@ -106,66 +183,70 @@ class Simulation:
             transition_cnt_field = "G: Transition Count"
 
             # Calculate
-            self.df[probability_numerator] = (
-                self.df[self.to_w_field] * self.df[self.from_w_field]
-            ) / self.df[self.dist_field]
-            sum_prob_num = self.df[probability_numerator].sum()
-            self.df[probability_field] = self.df[probability_numerator] / sum_prob_num
+            numerator = (self.to_w * self.from_w) / self.distance
 
         else:
             raise ValueError(
                 "Model must be in ['HUFF_SIMPLE', 'HUFF_DECAY', 'GRAVITY_SIMPLE']"
             )
 
+        # Accumulate Sum in Double Precision
+        sum_prob_num = numerator.sum(dtype=np.float64)
+        probability = (numerator / sum_prob_num).astype(np.float32)
+
         # Artificially Increase Probability by 100x
         if increase_prob:
-            self.df[probability_field] *= 100
+            probability *= 100
+
+        self.fields[probability_numerator] = numerator
+        self.fields[probability_field] = probability
 
         # Init Transition Count Field
-        self.df[transition_cnt_field] = 0
+        self.fields[transition_cnt_field] = np.zeros(len(self.index), dtype=np.int32)
+        self._df = None
 
         # Run Sims
         for i in tqdm(range(num_sims)):
-            self._run_single_sim(
-                probability_field, transition_cnt_field, starting_presence
-            )
+            with metrics.timer("simulation_step_seconds", model=model):
+                fired = self._run_single_sim(
+                    probability_field, transition_cnt_field, starting_presence
+                )
+
+            metrics.count("simulation_transitions", fired, model=model)
 
         # Return
         return self.df
 
     def _run_single_sim(
-        self, probability_field: str, transition_cnt_field: str, starting_presence: List
-    ) -> None:
+        self,
+        probability_field: str,
+        transition_cnt_field: str,
+        starting_presence: ndarray,
+    ) -> int:
         """Private method used to run a simgle simulation.
 
-        :param str probability_field: Name of series that represents probability of transition
-        :param str transition_cnt_field: Name of series that represents transition count
-        :param List starting_presence: Name of series that represents list of starting presence
+        :param str probability_field: Name of field that represents probability of transition
+        :param str transition_cnt_field: Name of field that represents transition count
+        :param ndarray starting_presence: Starting presence of each edge's origin
+        :return int: Number of transitions fired
         """
-        # Loop through Rows & Simulate Transfer
-        for index, row in self.df.iterrows():
-            if row[self.from_presence_field] == 1:
-                # Generate Random Number
-                n = random()
-
-                # Check if n < probability
-                if n < row[probability_field]:
-                    self.df.loc[index, self.to_presence_field] = 1
-                    self.df.loc[index, transition_cnt_field] += 1
-
-        # Get List of Cities with End Presence
-        end_presence = list(
-            self.df.loc[self.df[self.to_presence_field] == 1][self.to_id_field]
-        )
+        # Simulate Transfer on Edges whose Origin has Presence
+        n = self.rng.random(len(self.index), dtype=np.float32)
+        fired = (self.from_presence == 1) & (n < self.fields[probability_field])
 
-        # Reset Starting Presence to 0
-        self.df[self.from_presence_field] = 0
+        self.to_presence[fired] = 1
+        self.fields[transition_cnt_field] += fired
+        self._df = None
+
+        # Get Cities with End Presence
+        end_presence = np.zeros(len(self.names), dtype=np.uint8)
+        end_presence[self.to_codes[self.to_presence == 1]] = 1
 
         # Set New Starting Presence
-        self.df.loc[
-            self.df[self.from_id_field].isin(end_presence), [self.from_presence_field]
-        ] = 1
+        self.from_presence = end_presence[self.from_codes]
 
         # If All Vals are 0, reset to initial settings
-        if (self.df[self.from_presence_field] == 0).all() == True:
-            self.df[self.from_presence_field] = starting_presence
+        if not self.from_presence.any():
+            self.from_presence = starting_presence.copy()
+
+        return int(fired.sum())
@@ -2,18 +2,37 @@
 """RESTful API for accessing BMSB Simulation Results"""
 
 import os
+import time
 
-from flask import Flask
+from flask import Flask, Response, g, request
 from flask_restx import Api, Namespace, Resource
 
-from db import Database, Query
+import metrics
+
+from cache import TileCache
+from db import (
+    DatabaseUnavailable,
+    InvalidInput,
+    QueryError,
+    QueryTimeout,
+    initialize_from_env,
+)
+from responses import feature_collection, stream_response
 
 __author__ = "Luke Zaruba"
 __credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
 __status__ = "Production"
 
-# Set up DB Connection
-db = Database.initialize_from_env()
+# Set up DB Connection - Opened Now, so Bad Configuration Fails at Startup
+db = initialize_from_env()
+db.ensure_connected()
+Query = db.queries
+
+# Set up Vector Tile Cache
+tile_cache = TileCache.initialize_from_env()
+
+# Highest Zoom Level Served as Vector Tiles
+MAX_TILE_ZOOM = 22
 
 
 # Configure API
@@ -46,6 +65,193 @@ api.add_namespace(huff_decay_ns)
 api.add_namespace(gravity_ns)
 
 
+@app.before_request
+def start_timer() -> None:
+    """Starts timing the current request."""
+    g.start = time.perf_counter()
+    g.db_seconds = 0.0
+
+
+@app.after_request
+def record_metrics(response: Response) -> Response:
+    """Records DB, serialization and total latency of the current request.
+
+    :param Response response: Response to the current request
+    :return Response: Response, with its body wrapped for timing if it is streamed
+    """
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    method = request.method
+    start = g.get("start", time.perf_counter())
+
+    metrics.observe(route, "db", g.get("db_seconds", 0.0))
+
+    if response.is_streamed:
+        response.response = metrics.timed_body(
+            response.response, lambda s: metrics.observe(route, "serialize", s)
+        )
+
+    def finish():
+        metrics.observe(route, "total", time.perf_counter() - start)
+        metrics.REQUESTS.labels(route, method, response.status_code).inc()
+
+    response.call_on_close(finish)
+
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint() -> Response:
+    """Serves metrics in the Prometheus text format."""
+    data, content_type = metrics.render()
+
+    return Response(data, content_type=content_type)
+
+
+def timed_query(query: str, *user_input: int, stream: bool = False):
+    """Queries the database, adding the time taken to the DB latency of the current request.
+
+    :param str query: A SQL query that will be executed.
+    :param int user_input: User input(s) for query, in placeholder order.
+    :param bool stream: Whether rows are returned in batches as they are read, defaults to False
+    :return: The return from the SQL query.
+    """
+    start = time.perf_counter()
+
+    try:
+        if stream:
+            return db.stream(query, *user_input)
+
+        return db.query(query, *user_input)
+
+    finally:
+        g.db_seconds += time.perf_counter() - start
+
+
+def fetch(ns: Namespace, query: str, *user_input: int, stream: bool = False):
+    """Queries the database, aborting the request with a matching status if the query fails.
+
+    :param Namespace ns: Namespace the request was routed through
+    :param str query: A SQL query that will be executed.
+    :param int user_input: User input(s) for query, in placeholder order.
+    :param bool stream: Whether rows are returned in batches as they are read, defaults to False
+    :return: The rows returned by the SQL query, or an iterator of batches of rows when streamed.
+    """
+    try:
+        return timed_query(query, *user_input, stream=stream)
+
+    except InvalidInput as e:
+        ns.abort(400, str(e))
+
+    except DatabaseUnavailable:
+        ns.abort(503, "The database is unavailable.")
+
+    except QueryTimeout:
+        ns.abort(504, "The query timed out.")
+
+    except QueryError:
+        ns.abort(500, "The query failed.")
+
+
+def serve_geojson(ns: Namespace, query: str, top: int) -> Response:
+    """Streams a FeatureCollection of the features returned by a ranked query, as they are read.
+
+    The first batch of features is read before the response starts, so the
+    status code reflects whether the query succeeded. A query failing later
+    cuts the response short.
+
+    :param Namespace ns: Namespace the request was routed through
+    :param str query: Query that returns one Feature per row
+    :param int top: The number of top ranked results that will be returned
+    :return Response: FeatureCollection
+    """
+    batches = fetch(ns, query, top, stream=True)
+
+    return stream_response(feature_collection(batches))
+
+
+def serve_tile(
+    ns: Namespace,
+    layer: str,
+    tile_query: str,
+    version_query: str,
+    z: int,
+    x: int,
+    y: int,
+) -> Response:
+    """Serves a Mapbox Vector Tile for a layer, from the tile cache when possible.
+
+    :param Namespace ns: Namespace the request was routed through
+    :param str layer: Name of the layer (table) the tile is built from
+    :param str tile_query: Query that builds the tile
+    :param str version_query: Query that returns the data version of the layer
+    :param int z: Zoom level of the tile
+    :param int x: Column of the tile
+    :param int y: Row of the tile
+    :return Response: Encoded tile
+    """
+    # Backend Cannot Build Tiles
+    if tile_query is None:
+        ns.abort(501, "Vector tiles are not available from this backend.")
+
+    # Validate Tile Coordinates
+    if z > MAX_TILE_ZOOM or x >= 2**z or y >= 2**z:
+        ns.abort(404, "Tile {}/{}/{} does not exist.".format(z, x, y))
+
+    def version_loader():
+        rows = timed_query(version_query)
+
+        # Never Cache a Missing Version
+        if len(rows) != 1 or rows[0][0] is None:
+            raise QueryError("The layer has no data version.")
+
+        return rows[0][0]
+
+    def tile_loader():
+        rows = timed_query(tile_query, z, x, y)
+
+        # Empty Tiles are Returned as NULL by Older PostGIS Versions
+        if len(rows) != 1 or not isinstance(
+            rows[0][0], (bytes, memoryview, type(None))
+        ):
+            raise QueryError("The tile query returned an unexpected result.")
+
+        return bytes(rows[0][0] or b"")
+
+    try:
+        version = tile_cache.version(layer, version_loader)
+        etag = "{}-{}-{}-{}-{}".format(layer, version, z, x, y)
+
+        # Client Already has Tile, in any Encoding
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+
+        else:
+            tile = tile_cache.get(layer, version, z, x, y)
+
+            # Query - Only Successfully Built Tiles are Cached
+            if tile is None:
+                tile = tile_loader()
+                tile_cache.put(layer, version, z, x, y, tile)
+
+            response = stream_response(
+                tile, mimetype="application/vnd.mapbox-vector-tile"
+            )
+
+    except QueryTimeout:
+        ns.abort(504, "The tile query timed out.")
+
+    except QueryError:
+        ns.abort(503, "The tile could not be built.")
+
+    # Weak, as Identity, gzip & br Bodies of a Tile Share the ETag
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = int(tile_cache.version_ttl)
+
+    # Return
+    return response
+
+
 # Routes for Huff (Simple) Namespace
 @huff_simple_ns.route(
     "/incoming/<top>",
@@ -53,13 +259,8 @@ api.add_namespace(gravity_ns)
 )
 class HSIncoming(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.SIMPLE_HUFF_IN, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(huff_simple_ns, Query.SIMPLE_HUFF_IN, top)
 
 
 @huff_simple_ns.route(
@@ -68,13 +269,8 @@ class HSIncoming(Resource):
 )
 class HSOutgoing(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.SIMPLE_HUFF_OUT, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(huff_simple_ns, Query.SIMPLE_HUFF_OUT, top)
 
 
 @huff_simple_ns.route(
@@ -83,13 +279,31 @@ class HSOutgoing(Resource):
 )
 class HSProbability(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.SIMPLE_HUFF_RISK, top)[0][0]
-        db.close()
+        # Query & Return
+        return serve_geojson(huff_simple_ns, Query.SIMPLE_HUFF_RISK, top)
 
-        # Return
-        return out
+
+@huff_simple_ns.route(
+    "/tiles/<int:z>/<int:x>/<int:y>.mvt",
+    doc={
+        "params": {
+            "z": "Zoom level of the tile.",
+            "x": "Column of the tile.",
+            "y": "Row of the tile.",
+        }
+    },
+)
+class HSTiles(Resource):
+    def get(self, z, x, y):
+        return serve_tile(
+            huff_simple_ns,
+            "final_huff",
+            Query.SIMPLE_HUFF_TILE,
+            Query.SIMPLE_HUFF_VERSION,
+            z,
+            x,
+            y,
+        )
 
 
 # Routes for Huff (Decay) Namespace
@@ -99,13 +313,8 @@ class HSProbability(Resource):
 )
 class HDIncoming(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.DECAY_HUFF_IN, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(huff_decay_ns, Query.DECAY_HUFF_IN, top)
 
 
 @huff_decay_ns.route(
@@ -114,13 +323,8 @@ class HDIncoming(Resource):
 )
 class HDOutgoing(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.DECAY_HUFF_OUT, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(huff_decay_ns, Query.DECAY_HUFF_OUT, top)
 
 
 @huff_decay_ns.route(
@@ -129,13 +333,31 @@ class HDOutgoing(Resource):
 )
 class HDProbability(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.DECAY_HUFF_RISK, top)[0][0]
-        db.close()
+        # Query & Return
+        return serve_geojson(huff_decay_ns, Query.DECAY_HUFF_RISK, top)
 
-        # Return
-        return out
+
+@huff_decay_ns.route(
+    "/tiles/<int:z>/<int:x>/<int:y>.mvt",
+    doc={
+        "params": {
+            "z": "Zoom level of the tile.",
+            "x": "Column of the tile.",
+            "y": "Row of the tile.",
+        }
+    },
+)
+class HDTiles(Resource):
+    def get(self, z, x, y):
+        return serve_tile(
+            huff_decay_ns,
+            "final_huff_decay",
+            Query.DECAY_HUFF_TILE,
+            Query.DECAY_HUFF_VERSION,
+            z,
+            x,
+            y,
+        )
 
 
 # Routes for Gravity Namespace
@@ -145,13 +367,8 @@ class HDProbability(Resource):
 )
 class GIncoming(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.GRAVITY_IN, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(gravity_ns, Query.GRAVITY_IN, top)
 
 
 @gravity_ns.route(
@@ -160,13 +377,8 @@ class GIncoming(Resource):
 )
 class GOutgoing(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.GRAVITY_OUT, top)[0][0]
-        db.close()
-
-        # Return
-        return out
+        # Query & Return
+        return serve_geojson(gravity_ns, Query.GRAVITY_OUT, top)
 
 
 @gravity_ns.route(
@@ -175,18 +387,40 @@ class GOutgoing(Resource):
 )
 class GProbability(Resource):
     def get(self, top):
-        # Query
-        db.connect()
-        out = db.query(Query.GRAVITY_RISK, top)[0][0]
-        db.close()
+        # Query & Return
+        return serve_geojson(gravity_ns, Query.GRAVITY_RISK, top)
+
 
-        # Return
-        return out
+@gravity_ns.route(
+    "/tiles/<int:z>/<int:x>/<int:y>.mvt",
+    doc={
+        "params": {
+            "z": "Zoom level of the tile.",
+            "x": "Column of the tile.",
+            "y": "Row of the tile.",
+        }
+    },
+)
+class GTiles(Resource):
+    def get(self, z, x, y):
+        return serve_tile(
+            gravity_ns,
+            "final_gravity",
+            Query.GRAVITY_TILE,
+            Query.GRAVITY_VERSION,
+            z,
+            x,
+            y,
+        )
 
 
 if __name__ == "__main__":
     # Development
     # app.run(debug=True)
 
-    # Production
-    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
+    # Local Server - Use gunicorn with gunicorn.conf.py in Production
+    app.run(
+        debug=os.environ.get("FLASK_DEBUG") == "1",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8080)),
+    )
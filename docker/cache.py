@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""In-process cache for vector tiles, keyed by the version of the data they were built from."""
+
+from __future__ import annotations
+
+import os
+import time
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional, Tuple
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+
+class TileCache:
+    """
+    A class used to cache encoded vector tiles per layer and data version.
+
+    Methods
+    -------
+    initialize_from_env()
+        Initializes a tile cache, based on environmental variables.
+    version(layer, loader)
+        Returns the current data version of a layer.
+    get(layer, version, z, x, y)
+        Returns a cached tile, if one exists.
+    put(layer, version, z, x, y, tile)
+        Adds a tile to the cache.
+    """
+
+    def __init__(self, max_tiles: int = 4096, version_ttl: float = 60) -> None:
+        """Initializes the TileCache class.
+
+        :param int max_tiles: Maximum number of tiles held before the least recently used are evicted, defaults to 4096
+        :param float version_ttl: Seconds a data version is trusted before it is checked again, defaults to 60
+        """
+        self.max_tiles = max_tiles
+        self.version_ttl = version_ttl
+
+        self._tiles = OrderedDict()
+        self._versions = {}
+        self._lock = Lock()
+
+    @classmethod
+    def initialize_from_env(cls) -> TileCache:
+        """Instantiates a tile cache using enviornmental variables."""
+        max_tiles = int(os.environ.get("TILE_CACHE_SIZE", 4096))
+        version_ttl = float(os.environ.get("TILE_VERSION_TTL", 60))
+
+        return cls(max_tiles, version_ttl)
+
+    def version(self, layer: str, loader: Callable[[], str]) -> str:
+        """Returns the data version of a layer, reloading it once it is older than the TTL.
+
+        :param str layer: Name of the layer
+        :param Callable[[], str] loader: Function that looks up the current version
+        :return str: Data version of the layer
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._versions.get(layer)
+
+        if cached is not None and now - cached[1] < self.version_ttl:
+            return cached[0]
+
+        version = str(loader())
+
+        with self._lock:
+            self._versions[layer] = (version, now)
+
+        return version
+
+    def get(self, layer: str, version: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Returns a cached tile.
+
+        :param str layer: Name of the layer
+        :param str version: Data version of the layer
+        :param int z: Zoom level of the tile
+        :param int x: Column of the tile
+        :param int y: Row of the tile
+        :return Optional[bytes]: Encoded tile, or None if it is not cached
+        """
+        key = self._key(layer, version, z, x, y)
+
+        with self._lock:
+            tile = self._tiles.get(key)
+
+            if tile is not None:
+                self._tiles.move_to_end(key)
+
+        return tile
+
+    def put(
+        self, layer: str, version: str, z: int, x: int, y: int, tile: bytes
+    ) -> None:
+        """Adds a tile to the cache, evicting the least recently used tiles if it is full.
+
+        :param str layer: Name of the layer
+        :param str version: Data version of the layer
+        :param int z: Zoom level of the tile
+        :param int x: Column of the tile
+        :param int y: Row of the tile
+        :param bytes tile: Encoded tile
+        """
+        key = self._key(layer, version, z, x, y)
+
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    @staticmethod
+    def _key(layer: str, version: str, z: int, x: int, y: int) -> Tuple:
+        """Builds the cache key for a tile."""
+        return (layer, version, z, x, y)
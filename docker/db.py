@@ -1,56 +1,151 @@
 # -*- coding: utf-8 -*-
-"""Establishes an easy-to-use interface for working with PostgreSQL database."""
+"""Establishes an easy-to-use interface for working with the database backends of the API.
+
+Two backends are available, selected with the BACKEND environmental variable:
+"postgres" (default) queries the PostGIS database, while "local" loads the
+results CSVs into an embedded SQLite database at startup and answers the same
+queries in-process.
+"""
 
 from __future__ import annotations
 
+import csv
+import glob
 import os
+import sqlite3
+import struct
+import threading
+import time
+
+from typing import Iterator, Tuple, Union
 
 import psycopg2
 
+from psycopg2 import errors
+from psycopg2.pool import ThreadedConnectionPool
+
 __author__ = "Luke Zaruba"
 __credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
 __status__ = "Production"
 
 
+# Range of SQLite INTEGER Values
+SQLITE_MIN_INT = -(2**63)
+SQLITE_MAX_INT = 2**63 - 1
+
+
+class QueryError(Exception):
+    """Raised when a query fails."""
+
+
+class QueryTimeout(QueryError):
+    """Raised when a query is cancelled for exceeding the statement timeout."""
+
+
+class DatabaseUnavailable(QueryError):
+    """Raised when the database cannot be reached or loaded."""
+
+
+class InvalidInput(QueryError):
+    """Raised when user input for a query is not an integer."""
+
+
+def _prepend(first, rest: Iterator) -> Iterator:
+    """Yields an item already taken from an iterator, then the rest of it.
+
+    Closing the returned iterator also closes the original one.
+
+    :param first: Item already taken from the iterator
+    :param Iterator rest: Iterator the item was taken from
+    :yield: Items of the iterator
+    """
+    try:
+        yield first
+        yield from rest
+    finally:
+        rest.close()
+
+
+def _parse_input(user_input: Tuple) -> Tuple[int, ...]:
+    """Converts user input for a query to integers.
+
+    :param Tuple user_input: User input(s) for query
+    :raises InvalidInput: Error raised when an input is not an integer
+    :return Tuple[int, ...]: User input(s) as integers
+    """
+    try:
+        return tuple(int(i) for i in user_input)
+
+    except (TypeError, ValueError):
+        raise InvalidInput("Input must be an integer.") from None
+
+
 class Database:
     """
-    A class used to represent a database connection.
+    A class used to represent a pool of database connections.
+
+    The pool is created lazily in the process that first uses it, so each
+    pre-forked server worker gets its own connections after the fork.
 
     Methods
     -------
     initialize_from_env()
         Initializes a database object, based on environmental variable.
     connect()
-        Makes connection to database.
-    query(query)
+        Opens the connection pool for the current process.
+    ensure_connected()
+        Opens the connection pool, unless the current process already has one.
+    query(query, *user_input)
         Executes query on database.
+    stream(query, *user_input, batch_size)
+        Executes query on database, returning its rows in batches as they are read.
     close()
-        Closes connection to database.
+        Closes all connections in the pool.
+    _batches(query, params, batch_size)
+        Private method. Reads the rows of a query from a server-side cursor.
+    _getconn()
+        Private method. Takes a connection from the pool.
+    _failed(connection, e)
+        Static, private method. Rolls back a failed query.
     """
 
     def __init__(
-        self, host: str, user: str, password: str, db_name: str, port: int
+        self,
+        host: str,
+        user: str,
+        password: str,
+        db_name: str,
+        port: int,
+        pool_size: int = 8,
+        statement_timeout: int = 30000,
     ) -> None:
-        """Instantiates a database connection to a PostgreSQL database.
+        """Instantiates a database connection pool for a PostgreSQL database.
 
         :param str host: Host address of the database you would like to access.
         :param str user: Username credential for the database you would like to access.
         :param str password: Password credential for the database you would like to access.
         :param str db_name: Name of the database that you would like to access.
         :param int port: Port number of database.
+        :param int pool_size: Maximum number of connections held by each process, defaults to 8.
+        :param int statement_timeout: Milliseconds a single query may run before it is cancelled, defaults to 30000.
         """
         self.host = host
         self.user = user
         self.password = password
         self.db_name = db_name
         self.port = port
+        self.pool_size = pool_size
+        self.statement_timeout = statement_timeout
 
-        # Set Connection to None
-        self.connection = None
+        # Set Pool to None
+        self.pool = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
 
     @classmethod
     def initialize_from_env(cls) -> Database:
-        """Instantiates a database connection to a PostgreSQL database using enviornmental variables."""
+        """Instantiates a database connection pool for a PostgreSQL database using enviornmental variables."""
         # Extract Secrets
         host = os.environ.get("HOST")
         user = os.environ.get("USER")
@@ -58,152 +153,709 @@ class Database:
         db_name = os.environ.get("DBNAME")
         port = os.environ.get("DBPORT")
 
+        # Extract Pool Settings
+        pool_size = int(os.environ.get("DB_POOL_SIZE", 8))
+        statement_timeout = int(os.environ.get("STATEMENT_TIMEOUT_MS", 30000))
+
         # Return Instance
-        return cls(host, user, password, db_name, port)
+        return cls(host, user, password, db_name, port, pool_size, statement_timeout)
+
+    @property
+    def queries(self) -> type:
+        """Queries understood by this backend."""
+        return Query
 
     def connect(self) -> None:
-        """Makes connection to database."""
-        self.connection = psycopg2.connect(
+        """Opens the connection pool for the current process."""
+        self.pool = ThreadedConnectionPool(
+            0,
+            self.pool_size,
             host=self.host,
             database=self.db_name,
             user=self.user,
             password=self.password,
             port=self.port,
         )
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._pid = os.getpid()
+
+    def ensure_connected(self) -> None:
+        """Opens the connection pool, unless the current process already has one."""
+        # Pool Inherited Across a Fork Cannot be Shared, so Open a New One
+        if self.pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self.pool is None or self._pid != os.getpid():
+                    self.connect()
+
+    def query(self, query: str, *user_input: int) -> list:
+        """Executes a query on a pooled connection, opening the pool if needed.
+
+        :param str query: A SQL query that will be executed.
+        :param int user_input: User input(s) for query, in placeholder order.
+        :raises InvalidInput: Error raised when user input is not an integer.
+        :raises DatabaseUnavailable: Error raised when no connection to the database can be opened.
+        :raises QueryTimeout: Error raised when the query exceeds the statement timeout.
+        :raises QueryError: Error raised when the query fails for any other reason.
+        :return list: The rows returned by the SQL query.
+        """
+        params = _parse_input(user_input)
+        self.ensure_connected()
+
+        # Wait for a Free Connection
+        with self._slots:
+            connection = self._getconn()
+
+            try:
+                # Open Cursor
+                with connection.cursor() as c:
+                    # Try to Execute
+                    try:
+                        # Limit Runtime of this Request
+                        c.execute(
+                            "SET LOCAL statement_timeout = %s",
+                            (self.statement_timeout,),
+                        )
+
+                        # Execute Query
+                        c.execute(query, params)
+
+                        # Commit to DB
+                        connection.commit()
+
+                        # Return Output
+                        return c.fetchall()
+
+                    except Exception as e:
+                        raise self._failed(connection, e) from e
+
+            finally:
+                # Return Connection to Pool, Discarding it if it was Lost
+                self.pool.putconn(connection, close=bool(connection.closed))
+
+    def stream(self, query: str, *user_input: int, batch_size: int = 500) -> Iterator:
+        """Executes a query on a server-side cursor, returning its rows in batches as they are read.
+
+        The query is executed and its first batch fetched before this returns, so
+        those errors are raised here. The connection is held until the batches are
+        exhausted or closed, and later errors are raised while iterating.
+
+        :param str query: A SQL query that will be executed.
+        :param int user_input: User input(s) for query, in placeholder order.
+        :param int batch_size: Number of rows fetched at a time, defaults to 500.
+        :raises InvalidInput: Error raised when user input is not an integer.
+        :raises DatabaseUnavailable: Error raised when no connection to the database can be opened.
+        :raises QueryTimeout: Error raised when the query exceeds the statement timeout.
+        :raises QueryError: Error raised when the query fails for any other reason.
+        :return Iterator: Lists of rows returned by the SQL query.
+        """
+        params = _parse_input(user_input)
+        self.ensure_connected()
+
+        batches = self._batches(query, params, batch_size)
+
+        return _prepend(next(batches), batches)
+
+    def _batches(self, query: str, params: Tuple[int, ...], batch_size: int):
+        """Private method used to read the rows of a query from a server-side cursor.
+
+        :param str query: A SQL query that will be executed.
+        :param Tuple[int, ...] params: Parsed user input(s) for query.
+        :param int batch_size: Number of rows fetched at a time.
+        :yield list: Batch of rows, always at least one even if empty
+        """
+        # Wait for a Free Connection
+        with self._slots:
+            connection = self._getconn()
+
+            try:
+                # Try to Execute
+                try:
+                    # Limit Runtime of Each Fetch of this Request
+                    with connection.cursor() as c:
+                        c.execute(
+                            "SET LOCAL statement_timeout = %s",
+                            (self.statement_timeout,),
+                        )
+
+                    # Named Cursors Keep the Result on the Server Until Fetched
+                    with connection.cursor(name="stream") as c:
+                        c.execute(query, params)
+
+                        while True:
+                            rows = c.fetchmany(batch_size)
+                            yield rows
+
+                            if len(rows) < batch_size:
+                                break
+
+                    # Commit to DB
+                    connection.commit()
+
+                except Exception as e:
+                    raise self._failed(connection, e) from e
+
+            finally:
+                # Return Connection to Pool, which Rolls Back an Abandoned Stream
+                self.pool.putconn(connection, close=bool(connection.closed))
+
+    def _getconn(self):
+        """Private method used to take a connection from the pool.
+
+        :raises DatabaseUnavailable: Error raised when no connection to the database can be opened.
+        :return: Pooled connection
+        """
+        # Database is Down, Refusing Connections or Rejecting Credentials
+        try:
+            return self.pool.getconn()
+
+        except psycopg2.Error as e:
+            raise DatabaseUnavailable(str(e)) from e
+
+    @staticmethod
+    def _failed(connection, e: Exception) -> QueryError:
+        """Private method used to roll back a failed query.
+
+        :param connection: Connection the query failed on
+        :param Exception e: Error raised by the query
+        :return QueryError: Error that should be raised in its place
+        """
+        # Roll Back Transaction if Connection is Still Usable
+        if not connection.closed:
+            connection.rollback()
+
+        if isinstance(e, errors.QueryCanceled):
+            return QueryTimeout(str(e))
+
+        return QueryError(str(e))
+
+    def close(self):
+        """Closes all connections in the pool."""
+        # Close Connections Owned by this Process
+        if self.pool is not None and self._pid == os.getpid():
+            self.pool.closeall()
+
+        # Set Pool to None
+        self.pool = None
+        self._pid = None
+
+
+class LocalDatabase:
+    """
+    A class used to represent an embedded, in-memory database of the results CSVs.
+
+    Each final_*.csv file in the results directory is loaded into an indexed
+    table of the same name. The store is built when the API starts, so a bad
+    results directory fails before any request is served, and again in each
+    server worker after the fork.
+
+    Methods
+    -------
+    initialize_from_env()
+        Initializes a local database object, based on environmental variable.
+    connect()
+        Loads the results CSVs into the embedded database.
+    ensure_connected()
+        Loads the embedded database, unless the current process already has one.
+    query(query, *user_input)
+        Executes query on database.
+    stream(query, *user_input, batch_size)
+        Executes query on database, returning its rows in batches.
+    close()
+        Closes the embedded database.
+    _point_from_wkb(wkb)
+        Static, private method. Reads coordinates from a hex-encoded point.
+    """
+
+    def __init__(self, results_dir: str, statement_timeout: int = 30000) -> None:
+        """Instantiates an embedded database of the results CSVs.
+
+        :param str results_dir: Directory containing the final_*.csv results files.
+        :param int statement_timeout: Milliseconds a single query may run before it is cancelled, defaults to 30000.
+        """
+        self.results_dir = results_dir
+        self.statement_timeout = statement_timeout
+
+        # Set Connection to None
+        self.connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def initialize_from_env(cls) -> LocalDatabase:
+        """Instantiates an embedded database of the results CSVs using enviornmental variables."""
+        results_dir = os.environ.get(
+            "RESULTS_DIR",
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                os.pardir,
+                "data",
+                "model",
+                "results",
+            ),
+        )
+        statement_timeout = int(os.environ.get("STATEMENT_TIMEOUT_MS", 30000))
+
+        return cls(results_dir, statement_timeout)
+
+    @property
+    def queries(self) -> type:
+        """Queries understood by this backend."""
+        return LocalQuery
+
+    def connect(self) -> None:
+        """Loads the results CSVs into the embedded database."""
+        paths = sorted(glob.glob(os.path.join(self.results_dir, "final_*.csv")))
+
+        if not paths:
+            raise FileNotFoundError(
+                "No final_*.csv results found in " + self.results_dir
+            )
+
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+
+        for path in paths:
+            table = os.path.splitext(os.path.basename(path))[0]
+
+            # Read Rows, Keeping the Last Row for each City
+            rows = {}
+
+            with open(path, newline="", encoding="utf-8") as f:
+                for i, row in enumerate(csv.DictReader(f), start=1):
+                    x, y = self._point_from_wkb(row["geom"])
+                    rows[row["City"]] = (
+                        row["City"],
+                        x,
+                        y,
+                        int(row["Incoming"]),
+                        int(row["Outgoing"]),
+                        float(row["Risk"]),
+                        i,
+                    )
+
+            # Load Table with Precomputed Ranks, so Lookups are Index Scans
+            connection.execute(
+                "CREATE TEMPORARY TABLE staging (city TEXT, x REAL, y REAL, "
+                "incoming INTEGER, outgoing INTEGER, risk REAL, id INTEGER)"
+            )
+            connection.executemany(
+                "INSERT INTO staging VALUES (?, ?, ?, ?, ?, ?, ?)", rows.values()
+            )
+            connection.execute(
+                """
+                CREATE TABLE {} AS
+                SELECT *,
+                    RANK() OVER (ORDER BY incoming DESC) AS incoming_rank,
+                    RANK() OVER (ORDER BY outgoing DESC) AS outgoing_rank,
+                    RANK() OVER (ORDER BY risk DESC) AS risk_rank,
+                    RANK() OVER (ORDER BY risk) AS risk_asc_rank
+                FROM staging
+                """.format(
+                    table
+                )
+            )
+            connection.execute("DROP TABLE staging")
+
+            for field in [
+                "incoming_rank",
+                "outgoing_rank",
+                "risk_rank",
+                "risk_asc_rank",
+            ]:
+                connection.execute(
+                    "CREATE INDEX {0}_{1} ON {0} ({1})".format(table, field)
+                )
+
+        connection.commit()
+
+        self.connection = connection
+        self._pid = os.getpid()
+
+    def ensure_connected(self) -> None:
+        """Loads the embedded database, unless the current process already has one."""
+        # Store Inherited Across a Fork Cannot be Shared, so Load a New One
+        with self._lock:
+            if self.connection is None or self._pid != os.getpid():
+                self.connect()
 
-    def query(self, query: str, user_input: int) -> str:
-        """Executes a query on a database connection. A connection should already exist.
+    def query(self, query: str, *user_input: int) -> list:
+        """Executes a query on the embedded database, loading it if needed.
 
         :param str query: A SQL query that will be executed.
-        :param str user_input: User input for query.
-        :return str: The return from the SQL query.
+        :param int user_input: User input(s) for query, in placeholder order.
+        :raises InvalidInput: Error raised when user input is not an integer.
+        :raises DatabaseUnavailable: Error raised when the results CSVs cannot be loaded.
+        :raises QueryTimeout: Error raised when the query exceeds the statement timeout.
+        :raises QueryError: Error raised when the query fails for any other reason.
+        :return list: The rows returned by the SQL query.
         """
-        # Open Cursor
-        with self.connection.cursor() as c:
+        # Clamp to SQLite Integers, so Huge Inputs Return All Rows as in PostgreSQL
+        params = tuple(
+            min(max(i, SQLITE_MIN_INT), SQLITE_MAX_INT)
+            for i in _parse_input(user_input)
+        )
+
+        try:
+            self.ensure_connected()
+
+        except (
+            OSError,
+            ValueError,
+            KeyError,
+            csv.Error,
+            sqlite3.Error,
+            struct.error,
+        ) as e:
+            raise DatabaseUnavailable(str(e)) from e
+
+        with self._lock:
+            # Cancel Query Once Timeout is Exceeded - 0 Disables, as in PostgreSQL
+            if self.statement_timeout > 0:
+                deadline = time.monotonic() + self.statement_timeout / 1000
+                self.connection.set_progress_handler(
+                    lambda: time.monotonic() > deadline, 10000
+                )
+
             # Try to Execute
             try:
-                # Execute Query
-                c.execute(query, (int(user_input),))
+                return self.connection.execute(query, params).fetchall()
+
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    raise QueryTimeout(str(e)) from e
 
-                # Commit to DB
-                self.connection.commit()
+                raise QueryError(str(e)) from e
 
-                # Return Output
-                return c.fetchall()
+            except sqlite3.Error as e:
+                raise QueryError(str(e)) from e
 
-            except Exception as e:
-                # Roll Back Transaction if Invalid Query
-                self.connection.rollback()
+            finally:
+                self.connection.set_progress_handler(None, 0)
+
+    def stream(self, query: str, *user_input: int, batch_size: int = 500) -> Iterator:
+        """Executes a query on the embedded database, returning its rows in batches.
+
+        Rows are read in full before this returns, so the database is not locked
+        while they are sent.
+
+        :param str query: A SQL query that will be executed.
+        :param int user_input: User input(s) for query, in placeholder order.
+        :param int batch_size: Number of rows in each batch, defaults to 500.
+        :raises InvalidInput: Error raised when user input is not an integer.
+        :raises DatabaseUnavailable: Error raised when the results CSVs cannot be loaded.
+        :raises QueryTimeout: Error raised when the query exceeds the statement timeout.
+        :raises QueryError: Error raised when the query fails for any other reason.
+        :return Iterator: Lists of rows returned by the SQL query.
+        """
+        rows = self.query(query, *user_input)
 
-                # Display Error
-                return "Error: " + str(e)
+        return (rows[i : i + batch_size] for i in range(0, len(rows), batch_size))
 
     def close(self):
-        """Closes connection to database."""
-        # Close Connection
-        self.connection.close()
+        """Closes the embedded database."""
+        # Close Connection Owned by this Process
+        if self.connection is not None and self._pid == os.getpid():
+            self.connection.close()
 
         # Set Connection to None
         self.connection = None
+        self._pid = None
+
+    @staticmethod
+    def _point_from_wkb(wkb: str) -> Tuple[float, float]:
+        """Reads the coordinates of a hex-encoded (E)WKB point.
+
+        :param str wkb: Hex-encoded WKB or EWKB point
+        :return Tuple[float, float]: X and Y coordinates of the point
+        """
+        data = bytes.fromhex(wkb)
+        order = "<" if data[0] == 1 else ">"
+        (geom_type,) = struct.unpack_from(order + "I", data, 1)
+
+        # Skip SRID if Present
+        offset = 9 if geom_type & 0x20000000 else 5
+
+        return struct.unpack_from(order + "dd", data, offset)
+
+
+def initialize_from_env() -> Union[Database, LocalDatabase]:
+    """Instantiates the database backend selected by the BACKEND enviornmental variable."""
+    backend = os.environ.get("BACKEND", "postgres")
+
+    if backend == "postgres":
+        return Database.initialize_from_env()
+
+    if backend == "local":
+        return LocalDatabase.initialize_from_env()
+
+    raise ValueError("BACKEND must be in ['postgres', 'local']")
 
 
 class Query:
     """
     A class used to store SQL queries.
+
+    Ranked queries return one GeoJSON Feature per row, so they can be streamed.
     """
 
     # Huff Simple Queries
     SIMPLE_HUFF_IN = """
-    SELECT json_build_object(
-    'type', 'FeatureCollection',
-    'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY incoming DESC) as rank
             FROM final_huff
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     SIMPLE_HUFF_OUT = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY outgoing DESC) as rank
             FROM final_huff
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     SIMPLE_HUFF_RISK = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY risk DESC) as rank
             FROM final_huff
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
 
     # Huff Decay Queries
     DECAY_HUFF_IN = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY incoming DESC) as rank
             FROM final_huff_decay
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     DECAY_HUFF_OUT = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY outgoing DESC) as rank
             FROM final_huff_decay
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     DECAY_HUFF_RISK = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY risk DESC) as rank
             FROM final_huff_decay
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
 
     # Gravity Queries
     GRAVITY_IN = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY incoming DESC) as rank
             FROM final_gravity
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     GRAVITY_OUT = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY outgoing DESC) as rank
             FROM final_gravity
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
     """
     GRAVITY_RISK = """
-        SELECT json_build_object(
-        'type', 'FeatureCollection',
-        'features', json_agg(ST_AsGeoJSON(rankings.*)::json))
+        SELECT ST_AsGeoJSON(rankings.*)
         FROM (
             SELECT *, RANK() OVER (ORDER BY risk) as rank
             FROM final_gravity
         ) as rankings
-        WHERE rank <= %s;
+        WHERE rank <= %s
+        ORDER BY rank;
+    """
+
+    # Vector Tile Queries
+    SIMPLE_HUFF_TILE = """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ), tile AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.geom, 3857), bounds.geom) AS geom,
+                t.city, t.incoming, t.outgoing, t.risk
+            FROM final_huff t, bounds
+            WHERE t.geom && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(tile.*, 'final_huff') FROM tile;
+    """
+    DECAY_HUFF_TILE = """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ), tile AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.geom, 3857), bounds.geom) AS geom,
+                t.city, t.incoming, t.outgoing, t.risk
+            FROM final_huff_decay t, bounds
+            WHERE t.geom && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(tile.*, 'final_huff_decay') FROM tile;
+    """
+    GRAVITY_TILE = """
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ), tile AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.geom, 3857), bounds.geom) AS geom,
+                t.city, t.incoming, t.outgoing, t.risk
+            FROM final_gravity t, bounds
+            WHERE t.geom && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(tile.*, 'final_gravity') FROM tile;
+    """
+
+    # Data Version Queries - Change whenever a table is replaced or modified
+    SIMPLE_HUFF_VERSION = """
+        SELECT c.oid || '-' || COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0)
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = 'final_huff'::regclass;
+    """
+    DECAY_HUFF_VERSION = """
+        SELECT c.oid || '-' || COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0)
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = 'final_huff_decay'::regclass;
+    """
+    GRAVITY_VERSION = """
+        SELECT c.oid || '-' || COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0)
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = 'final_gravity'::regclass;
+    """
+
+
+class LocalQuery:
+    """
+    A class used to store SQLite queries for the local backend, mirroring Query.
+
+    Ranked queries return one GeoJSON Feature per row, so they can be streamed.
+    """
+
+    # Huff Simple Queries
+    SIMPLE_HUFF_IN = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', incoming_rank))
+        FROM final_huff
+        WHERE incoming_rank <= ?
+        ORDER BY incoming_rank;
     """
+    SIMPLE_HUFF_OUT = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', outgoing_rank))
+        FROM final_huff
+        WHERE outgoing_rank <= ?
+        ORDER BY outgoing_rank;
+    """
+    SIMPLE_HUFF_RISK = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', risk_rank))
+        FROM final_huff
+        WHERE risk_rank <= ?
+        ORDER BY risk_rank;
+    """
+
+    # Huff Decay Queries
+    DECAY_HUFF_IN = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', incoming_rank))
+        FROM final_huff_decay
+        WHERE incoming_rank <= ?
+        ORDER BY incoming_rank;
+    """
+    DECAY_HUFF_OUT = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', outgoing_rank))
+        FROM final_huff_decay
+        WHERE outgoing_rank <= ?
+        ORDER BY outgoing_rank;
+    """
+    DECAY_HUFF_RISK = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', risk_rank))
+        FROM final_huff_decay
+        WHERE risk_rank <= ?
+        ORDER BY risk_rank;
+    """
+
+    # Gravity Queries
+    GRAVITY_IN = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', incoming_rank))
+        FROM final_gravity
+        WHERE incoming_rank <= ?
+        ORDER BY incoming_rank;
+    """
+    GRAVITY_OUT = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', outgoing_rank))
+        FROM final_gravity
+        WHERE outgoing_rank <= ?
+        ORDER BY outgoing_rank;
+    """
+    GRAVITY_RISK = """
+        SELECT json_object(
+        'type', 'Feature',
+        'geometry', json_object('type', 'Point', 'coordinates', json_array(x, y)),
+        'properties', json_object(
+            'city', city, 'incoming', incoming, 'outgoing', outgoing,
+            'risk', risk, 'id', id, 'rank', risk_asc_rank))
+        FROM final_gravity
+        WHERE risk_asc_rank <= ?
+        ORDER BY risk_asc_rank;
+    """
+
+    # Vector Tiles are Only Served by the PostgreSQL Backend
+    SIMPLE_HUFF_TILE = None
+    DECAY_HUFF_TILE = None
+    GRAVITY_TILE = None
+    SIMPLE_HUFF_VERSION = None
+    DECAY_HUFF_VERSION = None
+    GRAVITY_VERSION = None
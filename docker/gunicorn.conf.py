@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Production server settings for the API, configured with environmental variables.
+
+Worker and thread counts default to values sized to the cores available to
+the container, honouring CPU affinity and cgroup CPU quotas. The DB pools of
+all workers together never exceed DB_MAX_CONNECTIONS (default 80), which
+should be kept below the max_connections of the PostgreSQL server, less any
+connections used by other clients.
+
+Setting GUNICORN_WORKER_CLASS to "gevent" serves requests from greenlets
+instead of threads, with psycopg2 made cooperative so DB I/O does not block.
+"""
+
+import math
+import os
+import tempfile
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+# Bind
+bind = ":{}".format(os.environ.get("PORT", 8080))
+
+
+def _available_cpus() -> int:
+    """Returns the number of CPUs this process may use, including cgroup CPU quotas."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 1
+
+    # cgroup v2 Reports "<quota> <period>", cgroup v1 Splits them Across Two Files
+    quotas = [
+        ("/sys/fs/cgroup/cpu.max", None),
+        (
+            "/sys/fs/cgroup/cpu/cpu.cfs_quota_us",
+            "/sys/fs/cgroup/cpu/cpu.cfs_period_us",
+        ),
+    ]
+
+    for quota_path, period_path in quotas:
+        try:
+            with open(quota_path) as f:
+                values = f.read().split()
+
+            if period_path is not None:
+                with open(period_path) as f:
+                    values.append(f.read().strip())
+
+        except OSError:
+            continue
+
+        if values[0] not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(values[0]) / int(values[1]))))
+
+        break
+
+    return max(1, cpus)
+
+
+# Workers - Pre-Forked Processes, each with their own DB Pool
+workers = int(os.environ.get("WEB_CONCURRENCY", _available_cpus() * 2 + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))
+
+# One DB Connection per Thread, Capped so all Workers Together Stay Within Budget
+db_max_connections = int(os.environ.get("DB_MAX_CONNECTIONS", 80))
+workers = max(1, min(workers, db_max_connections))
+pool_size = int(os.environ.get("DB_POOL_SIZE", threads))
+os.environ["DB_POOL_SIZE"] = str(max(1, min(pool_size, db_max_connections // workers)))
+
+# Restart Workers that Hang, and Recycle Workers to Bound Memory Growth
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# Load App Once in the Master so Workers Share its Memory - Except with gevent,
+# which must monkey patch before the app imports threading, ssl or psycopg2
+preload_app = (
+    os.environ.get("GUNICORN_PRELOAD", "1") == "1" and worker_class != "gevent"
+)
+
+# Log to Stdout/Stderr
+accesslog = "-"
+errorlog = "-"
+
+# Share Metrics Between Workers, so /metrics Reports the Whole Server
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="bmsb-metrics-")
+)
+
+
+def post_worker_init(worker):
+    """Makes psycopg2 cooperative when serving with gevent, and opens the DB backend.
+
+    A backend that fails to open stops the worker from booting, which stops the server.
+    """
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+    # Backend Opened in the Master Cannot be Shared, so Open the Worker's Own
+    from app import db
+
+    db.ensure_connected()
+
+
+def child_exit(server, worker):
+    """Removes the live metrics of a worker that exited."""
+    # Import prometheus_client Only, so the App is Never Imported in the Master
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Closes the DB pool of a worker when it shuts down."""
+    from app import db
+
+    db.close()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Collects request metrics for the API and renders them in the Prometheus text format.
+
+When PROMETHEUS_MULTIPROC_DIR is set (as gunicorn.conf.py does), every worker
+writes its samples there and /metrics aggregates them across all workers.
+"""
+
+import os
+import time
+
+from typing import Callable, Iterable, Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+REQUESTS = Counter(
+    "bmsb_api_requests_total",
+    "Requests handled, by route and status.",
+    ["route", "method", "status"],
+)
+LATENCY = Histogram(
+    "bmsb_api_request_seconds",
+    "Time spent handling requests, by route and phase (db, serialize or total).",
+    ["route", "phase"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def observe(route: str, phase: str, seconds: float) -> None:
+    """Records time spent in one phase of a request.
+
+    :param str route: Route rule that handled the request
+    :param str phase: Phase of the request, one of "db", "serialize" or "total"
+    :param float seconds: Time spent in the phase
+    """
+    LATENCY.labels(route, phase).observe(seconds)
+
+
+def timed_body(
+    body: Iterable[bytes], callback: Callable[[float], None]
+) -> Iterator[bytes]:
+    """Wraps a response body, measuring only the time spent producing its chunks.
+
+    Time spent by the server writing chunks to the client is not included.
+
+    :param Iterable[bytes] body: Response body
+    :param Callable[[float], None] callback: Called with the total time once the body is exhausted
+    :yield bytes: Chunk of the body
+    """
+    elapsed = 0.0
+    chunks = iter(body)
+
+    try:
+        while True:
+            start = time.perf_counter()
+
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+
+            yield chunk
+
+    finally:
+        # Release Resources Held by the Body, e.g. a Streaming DB Cursor
+        close = getattr(body, "close", None)
+
+        if close is not None:
+            close()
+
+    callback(elapsed)
+
+
+def render() -> Tuple[bytes, str]:
+    """Renders all metrics, aggregated across workers when running multi-process.
+
+    :return Tuple[bytes, str]: Rendered metrics and their content type
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
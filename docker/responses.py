@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Builds streamed, content-negotiated HTTP responses for the API."""
+
+import zlib
+
+from typing import Iterable, Iterator, Union
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+# Size of each chunk written to the client
+CHUNK_SIZE = 64 * 1024
+
+# Payloads smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Text mimetypes, compressed with brotli's text mode
+TEXT_MIMETYPES = ("application/json", "application/geo+json")
+
+
+def _chunks(payload: bytes):
+    """Splits a payload into fixed size chunks.
+
+    :param bytes payload: Payload that will be split
+    :yield bytes: Chunk of the payload
+    """
+    for i in range(0, len(payload), CHUNK_SIZE):
+        yield payload[i : i + CHUNK_SIZE]
+
+
+def _close(chunks: Iterable[bytes]) -> None:
+    """Closes an iterable of chunks, if it can be closed.
+
+    :param Iterable[bytes] chunks: Chunks that will be closed
+    """
+    close = getattr(chunks, "close", None)
+
+    if close is not None:
+        close()
+
+
+def _gzip(chunks: Iterable[bytes]):
+    """Compresses chunks with gzip, one chunk at a time.
+
+    :param Iterable[bytes] chunks: Chunks that will be compressed
+    :yield bytes: Compressed chunk
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    try:
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+
+    finally:
+        _close(chunks)
+
+    yield compressor.flush()
+
+
+def _brotli(chunks: Iterable[bytes], mode: int):
+    """Compresses chunks with brotli, one chunk at a time.
+
+    :param Iterable[bytes] chunks: Chunks that will be compressed
+    :param int mode: Brotli mode, brotli.MODE_TEXT or brotli.MODE_GENERIC
+    :yield bytes: Compressed chunk
+    """
+    compressor = brotli.Compressor(mode=mode, quality=5)
+
+    try:
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+
+    finally:
+        _close(chunks)
+
+    yield compressor.finish()
+
+
+def feature_collection(batches: Iterable[list]) -> Iterator[bytes]:
+    """Writes GeoJSON Features into a FeatureCollection as they are read.
+
+    :param Iterable[list] batches: Batches of rows, each holding one Feature as text
+    :raises TypeError: Error raised when a row does not hold text
+    :yield bytes: Chunk of the FeatureCollection, one per batch
+    """
+    yield b'{"type": "FeatureCollection", "features": ['
+
+    separator = b""
+
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+
+            if not all(isinstance(row[0], str) for row in batch):
+                raise TypeError("Features must be returned as text")
+
+            yield separator + ",".join(row[0] for row in batch).encode("utf-8")
+            separator = b","
+
+    finally:
+        _close(batches)
+
+    yield b"]}"
+
+
+def negotiate_encoding() -> str:
+    """Picks the best content encoding accepted by the client for the current request.
+
+    :return str: One of "br", "gzip" or "identity"
+    """
+    accepted = request.accept_encodings
+
+    if brotli is not None and accepted.quality("br") > 0:
+        return "br"
+
+    if accepted.quality("gzip") > 0:
+        return "gzip"
+
+    return "identity"
+
+
+def stream_response(
+    payload: Union[str, bytes, Iterable[bytes]],
+    mimetype: str = "application/json",
+    status: int = 200,
+) -> Response:
+    """Streams a payload to the client, compressed with the negotiated encoding.
+
+    Text and bytes are sent as-is, so JSON text produced by the database is never
+    parsed and re-serialized by the API. An iterable of chunks is sent as it is
+    read, and compressed whatever its size, as its size is not known upfront.
+
+    :param str | bytes | Iterable[bytes] payload: Body of the response
+    :param str mimetype: Mimetype of the response, defaults to "application/json"
+    :param int status: HTTP status code, defaults to 200
+    :raises TypeError: Error raised when the payload is not text, bytes or an iterable
+    :return Response: Streamed response
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+
+    if isinstance(payload, (bytes, bytearray)):
+        length = len(payload)
+        chunks = _chunks(payload)
+
+    elif hasattr(payload, "__iter__"):
+        length = None
+        chunks = iter(payload)
+
+    else:
+        raise TypeError(
+            "Payload must be str, bytes or an iterable, not " + type(payload).__name__
+        )
+
+    if length is None or length >= MIN_COMPRESS_SIZE:
+        encoding = negotiate_encoding()
+    else:
+        encoding = "identity"
+
+    if encoding == "br":
+        mode = brotli.MODE_TEXT if mimetype in TEXT_MIMETYPES else brotli.MODE_GENERIC
+        body = _brotli(chunks, mode)
+    elif encoding == "gzip":
+        body = _gzip(chunks)
+    else:
+        body = chunks
+
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    elif length is not None:
+        response.headers["Content-Length"] = str(length)
+
+    return response
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Tests the point decoding of the local API backend."""
+
+import struct
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from docker.db import LocalDatabase
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+
+def test_point_from_wkb_little_endian():
+    wkb = struct.pack("<BIdd", 1, 1, -93.265, 44.9778).hex()
+
+    assert LocalDatabase._point_from_wkb(wkb) == (-93.265, 44.9778)
+
+
+def test_point_from_wkb_big_endian():
+    wkb = struct.pack(">BIdd", 0, 1, -93.265, 44.9778).hex()
+
+    assert LocalDatabase._point_from_wkb(wkb) == (-93.265, 44.9778)
+
+
+def test_point_from_ewkb_with_srid():
+    wkb = struct.pack("<BIIdd", 1, 1 | 0x20000000, 4326, -92.1005, 46.7867).hex()
+
+    assert LocalDatabase._point_from_wkb(wkb.upper()) == (-92.1005, 46.7867)
+
+
+def test_point_from_ewkb_with_srid_big_endian():
+    wkb = struct.pack(">BIIdd", 0, 1 | 0x20000000, 26915, 480000.0, 4980000.0).hex()
+
+    assert LocalDatabase._point_from_wkb(wkb) == (480000.0, 4980000.0)
+
+
+def test_point_from_results_csv():
+    # Bluffton, First Row of data/model/results/final_huff.csv
+    wkb = "0101000020E6100000B9BC8742F6CE57C07496CA701B3C4740"
+
+    x, y = LocalDatabase._point_from_wkb(wkb)
+
+    assert -97.5 < x < -89.0
+    assert 43.0 < y < 49.5
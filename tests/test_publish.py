@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Tests the binary COPY encoding of bmsb.publish.Publisher."""
+
+import struct
+
+import pandas as pd
+import pytest
+
+from bmsb.publish import Publisher
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+# Little-Endian WKB Points
+POINT_A = struct.pack("<BIdd", 1, 1, 480000.0, 4980000.0)
+POINT_B = struct.pack("<BIdd", 1, 1, 500000.5, 5000000.25)
+
+
+def _decode(data: bytes) -> list:
+    """Decodes a PostgreSQL binary COPY stream of Publisher rows.
+
+    :param bytes data: Encoded rows
+    :return list: Decoded rows, as (id, city, geom, incoming, outgoing, risk) tuples
+    """
+    # Header - Signature, Flags & Header Extension Length
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    assert struct.unpack_from("!ii", data, 11) == (0, 0)
+    offset = 19
+
+    rows = []
+
+    while True:
+        (fields,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+
+        # Trailer
+        if fields == -1:
+            break
+
+        assert fields == 6
+
+        values = []
+
+        for _ in range(fields):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            values.append(data[offset : offset + length])
+            offset += length
+
+        id_, city, geom, incoming, outgoing, risk = values
+        assert (len(id_), len(incoming), len(outgoing), len(risk)) == (4, 8, 8, 8)
+
+        rows.append(
+            (
+                struct.unpack("!i", id_)[0],
+                city.decode("utf-8"),
+                geom,
+                struct.unpack("!q", incoming)[0],
+                struct.unpack("!q", outgoing)[0],
+                struct.unpack("!d", risk)[0],
+            )
+        )
+
+    # Nothing Follows the Trailer
+    assert offset == len(data)
+
+    return rows
+
+
+def _frame(geoms: list) -> pd.DataFrame:
+    """Creates results of two cities with the given geometries.
+
+    :param list geoms: Geometries of the two cities
+    :return pd.DataFrame: Results
+    """
+    return pd.DataFrame(
+        {
+            "City": ["Minneapolis", "Saint Louis Park"],
+            "geom": geoms,
+            "Incoming": [12, 2**40],
+            "Outgoing": [0, 7],
+            "Risk": [0.125, 1e-9],
+        }
+    )
+
+
+def _expected(geoms: list) -> list:
+    """Rows expected from encoding the results of _frame.
+
+    :param list geoms: WKB of the two cities
+    :return list: Decoded rows
+    """
+    return [
+        (1, "Minneapolis", geoms[0], 12, 0, 0.125),
+        (2, "Saint Louis Park", geoms[1], 2**40, 7, 1e-9),
+    ]
+
+
+def test_encode_bytes():
+    df = _frame([POINT_A, bytearray(POINT_B)])
+
+    assert _decode(Publisher._encode(df).read()) == _expected([POINT_A, POINT_B])
+
+
+def test_encode_hex():
+    df = _frame([POINT_A.hex(), POINT_B.hex().upper()])
+
+    assert _decode(Publisher._encode(df).read()) == _expected([POINT_A, POINT_B])
+
+
+def test_encode_shapely():
+    geometry = pytest.importorskip("shapely.geometry")
+
+    points = [geometry.Point(480000.0, 4980000.0), geometry.Point(500000.5, 5000000.25)]
+    df = _frame(points)
+
+    assert _decode(Publisher._encode(df).read()) == _expected([p.wkb for p in points])
+
+
+def test_encode_empty():
+    df = _frame([POINT_A, POINT_B]).iloc[:0]
+
+    assert _decode(Publisher._encode(df).read()) == []
+
+
+def test_encode_unicode_city():
+    df = _frame([POINT_A, POINT_B])
+    df["City"] = ["Mankato", "Lac qui Parle – Ñ"]
+
+    assert _decode(Publisher._encode(df).read())[1][1] == "Lac qui Parle – Ñ"
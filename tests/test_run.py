@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Tests the baseline comparison of the benchmark suite."""
+
+import math
+
+from benchmarks.run import compare
+
+__author__ = "Luke Zaruba"
+__credits__ = ["Luke Zaruba", "Mattie Gisselbeck"]
+__status__ = "Production"
+
+
+def _results(**metrics) -> dict:
+    """Wraps metrics of the API benchmark as a run.
+
+    :return dict: Run with a single benchmark
+    """
+    return {"benchmarks": {"api": metrics}}
+
+
+def test_lower_is_better():
+    baseline = _results(latency_p50_ms=10.0, seconds=1.0)
+    results = _results(latency_p50_ms=12.5, seconds=1.1)
+
+    assert compare(results, baseline, 0.2) == ["api.latency_p50_ms"]
+
+
+def test_higher_is_better():
+    baseline = _results(requests_per_sec=100.0, edges_per_sec=100.0)
+    results = _results(requests_per_sec=75.0, edges_per_sec=150.0)
+
+    assert compare(results, baseline, 0.2) == ["api.requests_per_sec"]
+
+
+def test_improvements_do_not_regress():
+    baseline = _results(seconds=1.0, requests_per_sec=100.0)
+    results = _results(seconds=0.5, requests_per_sec=200.0)
+
+    assert compare(results, baseline, 0.2) == []
+
+
+def test_zero_baseline():
+    baseline = _results(errors=0, seconds=0.0)
+
+    assert compare(_results(errors=3, seconds=0.0), baseline, 0.2) == ["api.errors"]
+    assert compare(_results(errors=0, seconds=0.0), baseline, 0.2) == []
+
+
+def test_zero_baseline_higher_is_better():
+    baseline = _results(requests_per_sec=0.0)
+
+    assert compare(_results(requests_per_sec=5.0), baseline, 0.2) == []
+
+
+def test_missing_and_uncompared_metrics_are_skipped():
+    baseline = {"benchmarks": {"api": {"bytes_per_request": 10}}}
+    results = {
+        "benchmarks": {
+            "api": {"bytes_per_request": 100, "errors": 5},
+            "model": {"seconds": math.inf},
+        }
+    }
+
+    assert compare(results, baseline, 0.2) == []
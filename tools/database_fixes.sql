@@ -1,3 +1,6 @@
+-- Legacy one-off fixes for tables written with GeoDataFrame.to_sql.
+-- bmsb.publish.Publisher now reprojects, deduplicates and swaps tables in directly.
+
 -- Create New Copies of Databases
 CREATE TABLE final_huff AS TABLE huff_model;
 CREATE TABLE final_huff_decay AS TABLE huff_model_distance_decay;